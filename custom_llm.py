@@ -1,21 +1,52 @@
 import asyncio
 import json
 import logging
+from functools import lru_cache
 import aiohttp
 import tiktoken
 from graphrag.llm.base.base_llm import BaseLLM
 from typing import List, Dict, Any, Optional, AsyncGenerator
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:  # fall back to the stdlib encoder
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
 log = logging.getLogger(__name__)
 
+@lru_cache(maxsize=32)
+def _role_prefix(role: str) -> str:
+    """Return the prompt prefix for a message role, e.g. 'SYSTEM: '"""
+    return f"{role.upper()}: "
+
 class CustomLLM(BaseLLM[List[Dict[str, str]], str]):
     """Custom LLM implementation using TGI"""
     def __init__(self, tgi_url: str = "http://<ip-address>:<port>"):
         super().__init__()
         self.tgi_url = tgi_url
         self._on_error = None
+        self._session: Optional[aiohttp.ClientSession] = None
         self.logger = logging.getLogger(__name__)
 
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared client session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=60)
+            )
+        return self._session
+
+    async def aclose(self) -> None:
+        """Close the shared client session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
     async def generate(
         self,
         messages: List[Dict[str, str]],
@@ -51,12 +82,15 @@ class CustomLLM(BaseLLM[List[Dict[str, str]], str]):
     ) -> Optional[str]:
         """Execute LLM with the given input."""
         try:
-            # Format the messages into a single prompt
-            prompt = "\\\\n".join(
-                f"{msg.get('role', 'user').upper()}: {msg['content']}"
-                for msg in input
-            )
-            prompt += "\\\\nASSISTANT:"
+            # Format the messages into a single prompt; each message's content
+            # is copied only once, by the final join
+            prompt_parts: List[str] = []
+            for msg in input:
+                prompt_parts.append(_role_prefix(msg.get('role', 'user')))
+                prompt_parts.append(msg['content'])
+                prompt_parts.append("\n")
+            prompt_parts.append("ASSISTANT:")
+            prompt = "".join(prompt_parts)
 
             payload = {
                 "inputs": prompt,
@@ -69,55 +103,69 @@ class CustomLLM(BaseLLM[List[Dict[str, str]], str]):
                 }
             }
 
-            self.logger.debug(f"Sending request to LLM with payload: {json.dumps(payload)}")
+            body = _json_dumps(payload)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Sending request to LLM with payload: {body.decode('utf-8')}")
 
-            async with aiohttp.ClientSession() as session:
-                try:
-                    async with session.post(
-                        f"{self.tgi_url}/generate_stream",
-                        json=payload,
-                        headers={"Content-Type": "application/json"},
-                        timeout=30  # Add timeout
-                    ) as response:
-                        if response.status != 200:
-                            error_text = await response.text()
-                            self.logger.error(f"Error from LLM server (status {response.status}): {error_text}")
-                            return None
-
-                        full_response = ""
-                        try:
-                            async for line in response.content:
-                                if line:
-                                    line = line.decode('utf-8').strip()
-                                    if line.startswith("data: "):
-                                        try:
-                                            token_data = json.loads(line[6:])
-                                            if 'token' in token_data and 'text' in token_data['token']:
-                                                token = token_data['token']['text']
-                                                full_response += token
-                                        except json.JSONDecodeError as e:
-                                            self.logger.warning(f"Failed to decode token: {e}")
-                                            continue
-
-                        except Exception as e:
-                            self.logger.error(f"Error processing stream: {e}", exc_info=True)
-                            if full_response:  # Return partial response if available
-                                return full_response.strip()
-                            return None
-
-                except aiohttp.ClientError as e:
-                    self.logger.error(f"Network error connecting to LLM: {e}")
-                    return None
-                except asyncio.TimeoutError:
-                    self.logger.error("Request to LLM timed out")
-                    return None
+            session = self._get_session()
+            try:
+                async with session.post(
+                    f"{self.tgi_url}/generate_stream",
+                    data=body,
+                    headers={"Content-Type": "application/json"},
+                    timeout=30  # Add timeout
+                ) as response:
+                    if response.status != 200:
+                        error_text = await response.text()
+                        self.logger.error(f"Error from LLM server (status {response.status}): {error_text}")
+                        return None
+
+                    parts: List[str] = []
+                    try:
+                        pending = b""
+                        async for chunk in response.content.iter_chunked(65536):
+                            pending = self._consume_sse_frames(pending + chunk, parts)
+                        if pending:
+                            self._consume_sse_frames(pending + b"\n", parts)
+
+                    except Exception as e:
+                        self.logger.error(f"Error processing stream: {e}", exc_info=True)
+                        if parts:  # Return partial response if available
+                            return "".join(parts).strip()
+                        return None
 
+            except aiohttp.ClientError as e:
+                self.logger.error(f"Network error connecting to LLM: {e}")
+                return None
+            except asyncio.TimeoutError:
+                self.logger.error("Request to LLM timed out")
+                return None
+
+            full_response = "".join(parts)
             return full_response.strip() if full_response else None
 
         except Exception as e:
             self.logger.error(f"Error executing LLM: {e}", exc_info=True)
             return None
 
+    def _consume_sse_frames(self, buffer: bytes, parts: List[str]) -> bytes:
+        """Parse complete SSE lines in buffer into parts and return the unconsumed tail."""
+        start = 0
+        end = buffer.find(b"\n")
+        while end != -1:
+            if buffer.startswith(b"data: ", start, end):
+                try:
+                    token = _json_loads(buffer[start + 6:end])['token']['text']
+                except (KeyError, TypeError):
+                    pass  # data frame without token text
+                except ValueError as e:
+                    self.logger.warning(f"Failed to decode token: {e}")
+                else:
+                    parts.append(token)
+            start = end + 1
+            end = buffer.find(b"\n", start)
+        return buffer[start:]
+
     async def _stream_execute_llm(
         self,
         messages: List[Dict[str, str]],
@@ -1,11 +1,16 @@
+import mmap
 import os
 import shutil
 import string
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set
 import logging
 
 log = logging.getLogger(__name__)
 
+# Files larger than this are read through mmap instead of a single os.read
+MMAP_THRESHOLD = 1024 * 1024
+
 class FileProcessor:
     """Handles MD file processing and cleanup"""
 
@@ -16,54 +21,144 @@ class FileProcessor:
         cleaned_name = ''.join(c for c in filename if c in valid_chars)
         return cleaned_name
 
+    @staticmethod
+    def _scan_entries(directory_path: str) -> List[os.DirEntry]:
+        """List directory entries, returning an empty list if it cannot be read"""
+        try:
+            with os.scandir(directory_path) as it:
+                return list(it)
+        except OSError as e:
+            log.error(f"Error scanning directory {directory_path}: {e}")
+            return []
+
+    @staticmethod
+    def _iter_md_files(directory_path: str) -> Iterator[str]:
+        """Yield paths of all MD files in directory and subdirectories"""
+        for entry in FileProcessor._scan_entries(directory_path):
+            if entry.is_dir(follow_symlinks=False):
+                yield from FileProcessor._iter_md_files(entry.path)
+            elif entry.name.endswith('.md'):
+                yield entry.path
+
+    @staticmethod
+    def _iter_sanitized_md_files(
+        directory_path: str,
+        seen: Optional[Set[str]] = None
+    ) -> Iterator[str]:
+        """Sanitize names while walking and yield the final paths of MD files"""
+        if seen is None:
+            seen = set()
+
+        # Finish every rename in this directory before yielding any file from
+        # it, so no read submitted by the caller can race a rename
+        paths = []
+        for entry in FileProcessor._scan_entries(directory_path):
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if not is_dir and not entry.name.endswith('.md'):
+                continue
+
+            path = entry.path
+            clean_name = FileProcessor.clean_filename(entry.name)
+            if entry.name != clean_name:
+                clean_path = os.path.join(directory_path, clean_name)
+                if os.path.lexists(clean_path):
+                    log.warning(f"Not renaming {entry.path}: {clean_path} already exists")
+                else:
+                    shutil.move(entry.path, clean_path)
+                    path = clean_path
+            paths.append((path, is_dir))
+
+        for path, is_dir in paths:
+            resolved = os.path.abspath(path)
+            if resolved in seen:
+                continue
+            seen.add(resolved)
+
+            if is_dir:
+                yield from FileProcessor._iter_sanitized_md_files(path, seen)
+            else:
+                yield path
+
     @staticmethod
     def sanitize_directory(directory_path: str) -> None:
         """Sanitize all filenames in the directory"""
-        for root, dirs, files in os.walk(directory_path):
-            # Clean directory names
-            for dir_name in dirs:
-                clean_dir_name = FileProcessor.clean_filename(dir_name)
-                if dir_name != clean_dir_name:
-                    old_path = os.path.join(root, dir_name)
-                    new_path = os.path.join(root, clean_dir_name)
-                    shutil.move(old_path, new_path)
-
-            # Clean file names
-            for filename in files:
-                if filename.endswith('.md'):
-                    clean_name = FileProcessor.clean_filename(filename)
-                    if filename != clean_name:
-                        old_path = os.path.join(root, filename)
-                        new_path = os.path.join(root, clean_name)
-                        shutil.move(old_path, new_path)
+        for _ in FileProcessor._iter_sanitized_md_files(directory_path):
+            pass
 
     @staticmethod
-    def read_md_files(directory_path: str) -> List[Dict[str, Any]]:
-        """Read all MD files from directory and subdirectories"""
+    def _read_file(file_path: str) -> Optional[str]:
+        """Read a single file, returning None if it cannot be read"""
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+            try:
+                size = os.fstat(fd).st_size
+                if size > MMAP_THRESHOLD:
+                    with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                        text = str(mm, 'utf-8')
+                else:
+                    text = os.read(fd, size).decode('utf-8')
+            finally:
+                os.close(fd)
+
+            # Match text-mode universal newline handling
+            if '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+            return text
+        except Exception as e:
+            log.error(f"Error reading file {file_path}: {e}")
+            return None
+
+    @staticmethod
+    def _load_documents(
+        directory_path: str,
+        file_paths: Iterable[str],
+        max_workers: int
+    ) -> List[Dict[str, Any]]:
+        """Read the given MD files and wrap them as documents with metadata"""
+        # Overlap the per-file open/read latency across a thread pool;
+        # reads are submitted as paths are discovered
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = [
+                (file_path, executor.submit(FileProcessor._read_file, file_path))
+                for file_path in file_paths
+            ]
+
         documents = []
+        for file_path, future in pending:
+            content = future.result()
+            if content is None:
+                continue
+
+            # Create relative path from base directory
+            rel_path = os.path.relpath(file_path, directory_path)
 
-        for root, _, files in os.walk(directory_path):
-            for file in files:
-                if file.endswith('.md'):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-
-                            # Create relative path from base directory
-                            rel_path = os.path.relpath(file_path, directory_path)
-
-                            # Create document with metadata
-                            doc = {
-                                "text": content,
-                                "metadata": {
-                                    "source": rel_path,
-                                    "filename": file,
-                                    "folder": os.path.basename(root)
-                                }
-                            }
-                            documents.append(doc)
-                    except Exception as e:
-                        log.error(f"Error reading file {file_path}: {e}")
+            # Create document with metadata
+            doc = {
+                "text": content,
+                "metadata": {
+                    "source": rel_path,
+                    "filename": os.path.basename(file_path),
+                    "folder": os.path.basename(os.path.dirname(file_path))
+                }
+            }
+            documents.append(doc)
 
         return documents
+
+    @staticmethod
+    def read_md_files(directory_path: str, max_workers: int = 32) -> List[Dict[str, Any]]:
+        """Read all MD files from directory and subdirectories"""
+        return FileProcessor._load_documents(
+            directory_path,
+            FileProcessor._iter_md_files(directory_path),
+            max_workers
+        )
+
+    @staticmethod
+    def sanitize_and_read(directory_path: str, max_workers: int = 32) -> List[Dict[str, Any]]:
+        """Sanitize filenames and read all MD files in a single directory pass"""
+        return FileProcessor._load_documents(
+            directory_path,
+            FileProcessor._iter_sanitized_md_files(directory_path),
+            max_workers
+        )
@@ -1,6 +1,8 @@
 import asyncio
 import logging
-from typing import List, Dict, Any
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Dict, Any, Tuple
 from typing import Optional
 import time 
 
@@ -9,6 +11,23 @@ from md_context_builder import MDContextBuilder
 
 log = logging.getLogger(__name__)
 
+# Constant part of the system prompt that precedes the built context
+_SYSTEM_PROMPT_PREFIX = (
+    "You are a helpful AI assistant. Your task is to provide accurate "
+    "and relevant information based on the context provided. If the context "
+    "contains relevant information, use it in your response. If not, provide "
+    "a general response based on your knowledge.\n\n"
+)
+
+@dataclass(slots=True)
+class SearchResult:
+    """Result of a local search query"""
+    response: str
+    context_text: str
+    metrics: Dict[str, Any]
+    success: bool
+    matched_docs: int
+
 class LocalSearch:
     def __init__(
         self,
@@ -22,8 +41,25 @@ class LocalSearch:
         self.token_encoder = token_encoder
         self.llm_params = llm_params
         self.logger = logging.getLogger(__name__)
+        # Contexts repeat across queries that hit the same documents
+        self._context_token_counts: "OrderedDict[str, int]" = OrderedDict()
+        self._max_cached_contexts = 128
+
+    def _count_tokens(self, context: str, response: str) -> Tuple[int, int]:
+        """Count context and response tokens, reusing counts for repeated contexts."""
+        response_tokens = len(self.token_encoder.encode_ordinary(response))
+        context_tokens = self._context_token_counts.get(context)
+        if context_tokens is not None:
+            self._context_token_counts.move_to_end(context)
+            return context_tokens, response_tokens
+
+        context_tokens = len(self.token_encoder.encode_ordinary(context))
+        self._context_token_counts[context] = context_tokens
+        if len(self._context_token_counts) > self._max_cached_contexts:
+            self._context_token_counts.popitem(last=False)
+        return context_tokens, response_tokens
 
-    async def asearch(self, query: str) -> Any:
+    async def asearch(self, query: str) -> SearchResult:
         try:
             # Build context
             context_result = self.context_builder.build_context(query)
@@ -32,19 +68,14 @@ class LocalSearch:
                 self.logger.warning("No context found for query")
 
             # Log the context for debugging
-            self.logger.debug(f"Generated context: {context_result.context_chunks[:500]}...")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Generated context: {context_result.context_chunks[:500]}...")
 
             # Prepare messages for LLM with more explicit system prompt
             messages = [
                 {
                     "role": "system",
-                    "content": (
-                        "You are a helpful AI assistant. Your task is to provide accurate "
-                        "and relevant information based on the context provided. If the context "
-                        "contains relevant information, use it in your response. If not, provide "
-                        "a general response based on your knowledge.\\n\\n"
-                        f"{context_result.context_chunks}"
-                    )
+                    "content": _SYSTEM_PROMPT_PREFIX + context_result.context_chunks
                 },
                 {
                     "role": "user",
@@ -53,7 +84,8 @@ class LocalSearch:
             ]
 
             # Log the full message structure
-            self.logger.debug(f"Sending messages to LLM: {messages}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Sending messages to LLM: {messages}")
 
             # Generate response with timeout
             self.logger.info(f"GENERATE ANSWER: {time.time()}. QUERY: {query}")
@@ -72,37 +104,40 @@ class LocalSearch:
                 response = "I apologize, but I was unable to generate a response. Please try rephrasing your question."
 
             # Create detailed metrics
+            context_tokens, response_tokens = self._count_tokens(
+                context_result.context_chunks, response or ""
+            )
             metrics = {
-                'context_tokens': len(self.token_encoder.encode(context_result.context_chunks)),
-                'response_tokens': len(self.token_encoder.encode(response)) if response else 0,
+                'context_tokens': context_tokens,
+                'response_tokens': response_tokens,
                 'matched_documents': len(context_result.context_records['documents']),
                 'total_context_length': len(context_result.context_chunks),
                 'query_length': len(query)
             }
 
             # Create result object with more detailed information
-            result = type('SearchResult', (), {
-                'response': response,
-                'context_text': context_result.context_chunks,
-                'metrics': metrics,
-                'success': bool(response and response.strip()),
-                'matched_docs': len(context_result.context_records['documents'])
-            })
+            result = SearchResult(
+                response=response,
+                context_text=context_result.context_chunks,
+                metrics=metrics,
+                success=bool(response and response.strip()),
+                matched_docs=len(context_result.context_records['documents'])
+            )
 
             return result
 
         except Exception as e:
             self.logger.error(f"Error in asearch: {e}", exc_info=True)
             # Return a result object even in case of error
-            return type('SearchResult', (), {
-                'response': f"An error occurred while processing your query: {str(e)}",
-                'context_text': "",
-                'metrics': {
+            return SearchResult(
+                response=f"An error occurred while processing your query: {str(e)}",
+                context_text="",
+                metrics={
                     'context_tokens': 0,
                     'response_tokens': 0,
                     'matched_documents': 0,
                     'error': str(e)
                 },
-                'success': False,
-                'matched_docs': 0
-            })
+                success=False,
+                matched_docs=0
+            )
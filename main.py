@@ -26,6 +26,7 @@ async def main():
     os.makedirs(data_dir, exist_ok=True)
 
     print("Initializing GraphRAG...")
+    llm = None
     try:
         # Initialize llm parameters
         llm_params = LLMParameters(
@@ -50,13 +51,9 @@ async def main():
             llm=llm_params
         )
 
-        # Initialize file processor and clean filenames
-        print("Cleaning filenames...")
-        FileProcessor.sanitize_directory(base_dir)
-
-        # Read all MD files
-        print("Reading MD files...")
-        documents = FileProcessor.read_md_files(base_dir)
+        # Clean filenames and read all MD files in a single pass
+        print("Cleaning filenames and reading MD files...")
+        documents = FileProcessor.sanitize_and_read(base_dir)
         print(f"Found {len(documents)} documents")
 
         # Initialize components
@@ -110,14 +107,24 @@ async def main():
                     }
                 ]
 
-                # First try direct LLM response for comparison
-                print("\\nDirect LLM response:")
-                try:
-                    direct_response = await llm.agenerate(
+                # Run the direct LLM response and the full RAG search concurrently
+                direct_task = asyncio.create_task(
+                    llm.agenerate(
                         messages,
                         max_tokens=200,
                         temperature=0.7
                     )
+                )
+                rag_task = asyncio.create_task(search.asearch(query))
+                direct_response, result = await asyncio.gather(
+                    direct_task, rag_task, return_exceptions=True
+                )
+
+                # Direct LLM response for comparison
+                print("\\nDirect LLM response:")
+                try:
+                    if isinstance(direct_response, BaseException):
+                        raise direct_response
                     if direct_response:
                         print(f"Direct response: {direct_response}\\n")
                     else:
@@ -126,10 +133,11 @@ async def main():
                     logger.error(f"Error getting direct response: {e}")
                     print("Failed to get direct response.")
 
-                # Then try the full RAG search
+                # Then the full RAG search
                 print("Generating RAG response...")
                 try:
-                    result = await search.asearch(query)
+                    if isinstance(result, BaseException):
+                        raise result
 
                     logger.debug("Search completed")
                     logger.debug("Response length: %d", len(result.response) if result.response else 0)
@@ -175,6 +183,11 @@ async def main():
         print("Please ensure all components are properly installed and configured.")
         return 1
 
+    finally:
+        # Release pooled connections to the LLM server
+        if llm is not None:
+            await llm.aclose()
+
 
 if __name__ == "__main__":
     asyncio.run(main())
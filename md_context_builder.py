@@ -1,23 +1,78 @@
 import logging
-import pandas as pd
+import math
+import re
+from collections import Counter, OrderedDict, defaultdict
+import numpy as np
 from graphrag.query.context_builder.builders import LocalContextBuilder, ContextBuilderResult
 from graphrag.query.context_builder.conversation_history import ConversationHistory
-from typing import List, Dict, Any
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Tuple
 from typing import Optional
 
 log = logging.getLogger(__name__)
 
+_TOKEN_RE = re.compile(r"\w+")
+
+# BM25 term-frequency saturation and length normalization parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Constant halves of the system message wrapped around the per-query context
+_SYSTEM_PREFIX = (
+    "You are a helpful assistant. Use the following context to answer the user's question.\n"
+    "If you cannot find relevant information in the context, use your general knowledge to provide a helpful response.\n\n"
+    "Context:\n"
+)
+_SYSTEM_SUFFIX = (
+    "\n\nAnswer the question based on the above context and your knowledge. If using information from the context,\n"
+    "cite the source in your response."
+)
+
 class MDContextBuilder(LocalContextBuilder):
     """Custom context builder for MD files"""
-    def __init__(self, documents: List[Dict[str, Any]]):
+    def __init__(self, documents: List[Dict[str, Any]], cache_size: int = 128):
         self.documents = documents
-        self.df = pd.DataFrame([
-            {
-                "text": doc["text"],
-                **doc["metadata"]
-            }
-            for doc in documents
-        ])
+
+        # LRU cache of (system message, prompt tokens, records) keyed by the query's term set
+        self._cache: "OrderedDict[frozenset, Tuple[str, int, Tuple[Mapping[str, Any], ...]]]" = OrderedDict()
+        self._cache_size = cache_size
+
+        # Inverted index with precomputed BM25 weights:
+        # token -> (ids of documents containing it, per-document weights)
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+        term_freqs: Dict[str, Dict[int, int]] = defaultdict(dict)
+        doc_lengths = np.zeros(len(documents), dtype=np.float32)
+        for doc_id, doc in enumerate(documents):
+            tokens = _TOKEN_RE.findall(doc["text"].lower())
+            doc_lengths[doc_id] = len(tokens)
+            for token, count in Counter(tokens).items():
+                term_freqs[token][doc_id] = count
+
+        n_docs = len(documents)
+        avg_length = max(float(doc_lengths.mean()), 1.0) if n_docs else 1.0
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths / avg_length)
+        for token, freqs in term_freqs.items():
+            doc_ids = np.fromiter(freqs.keys(), dtype=np.int32, count=len(freqs))
+            tf = np.fromiter(freqs.values(), dtype=np.float32, count=len(freqs))
+            idf = math.log(1 + (n_docs - len(freqs) + 0.5) / (len(freqs) + 0.5))
+            weights = idf * tf * (BM25_K1 + 1) / (tf + length_norm[doc_ids])
+            self.postings[token] = (doc_ids, weights.astype(np.float32))
+
+    @staticmethod
+    def _make_result(
+        system_message: str,
+        prompt_tokens: int,
+        records: Tuple[Mapping[str, Any], ...]
+    ) -> ContextBuilderResult:
+        """Build a result with its own copy of the records, so callers may modify it freely"""
+        return ContextBuilderResult(
+            context_chunks=system_message,
+            context_records={"documents": [dict(record) for record in records]},
+            llm_calls=0,
+            prompt_tokens=prompt_tokens,
+            output_tokens=0
+        )
 
     def build_context(
         self,
@@ -27,58 +82,71 @@ class MDContextBuilder(LocalContextBuilder):
     ) -> ContextBuilderResult:
         """Build context from MD documents"""
         try:
-            query_terms = query.lower().split()
+            query_terms = frozenset(_TOKEN_RE.findall(query.lower()))
 
-            matched_docs = []
-            for doc in self.documents:
-                text = doc["text"].lower()
-                score = sum(1 for term in query_terms if term in text)
-                if score > 0:
-                    matched_docs.append((doc, score))
+            # The context depends only on the query terms, so repeated or
+            # reworded queries with the same terms reuse the built result
+            cached = self._cache.get(query_terms)
+            if cached is not None:
+                self._cache.move_to_end(query_terms)
+                return self._make_result(*cached)
 
-            matched_docs.sort(key=lambda x: x[1], reverse=True)
-            top_docs = matched_docs[:5] if matched_docs else self.documents[:5]
+            scores = np.zeros(len(self.documents), dtype=np.float32)
+            for term in query_terms:
+                posting = self.postings.get(term)
+                if posting is not None:
+                    doc_ids, weights = posting
+                    scores[doc_ids] += weights
+
+            # Highest score first; ties keep corpus order. Partition to find the
+            # 5th-best score so only the candidates at or above it get sorted.
+            matched_ids = np.flatnonzero(scores)
+            matched_scores = scores[matched_ids]
+            if len(matched_ids) > 5:
+                threshold = np.partition(matched_scores, len(matched_scores) - 5)[-5]
+                keep = matched_scores >= threshold
+                matched_ids = matched_ids[keep]
+                matched_scores = matched_scores[keep]
+            top_ids = matched_ids[np.argsort(-matched_scores, kind="stable")[:5]]
+            top_docs = [
+                (self.documents[doc_id], round(float(scores[doc_id]), 3))
+                for doc_id in top_ids
+            ]
+            if not top_docs:
+                top_docs = [(doc, 0) for doc in self.documents[:5]]
 
             # Fixed context text formatting
-            context_text = "\\n\\n---\\n\\n".join(
-                f'''Source: {doc['metadata']['source']}
-                Relevance Score: {score}
-                Content: {doc['text'][:1000]}'''  # Limit text size per doc
+            context_text = "\n\n---\n\n".join(
+                "".join((
+                    "Source: ", doc['metadata']['source'],
+                    "\nRelevance Score: ", str(score),
+                    "\nContent: ", doc['text'][:1000]  # Limit text size per doc
+                ))
                 for doc, score in top_docs
             )
 
-            context_records = {
-                "documents": pd.DataFrame([
-                    {
-                        "text": doc["text"],
-                        "score": score,
-                        **doc["metadata"]
-                    }
-                    for doc, score in top_docs
-                ])
-            }
-
-            system_message = f'''You are a helpful assistant. Use the following context to answer the user's question.
-            If you cannot find relevant information in the context, use your general knowledge to provide a helpful response.
-
-            Context:
-            {context_text}
+            # Stored as read-only mappings so cached entries cannot be mutated
+            records = tuple(
+                MappingProxyType({
+                    "text": doc["text"],
+                    "score": score,
+                    **doc["metadata"]
+                })
+                for doc, score in top_docs
+            )
 
-            Answer the question based on the above context and your knowledge. If using information from the context,
-            cite the source in your response.'''
+            system_message = "".join((_SYSTEM_PREFIX, context_text, _SYSTEM_SUFFIX))
 
-            return ContextBuilderResult(
-                context_chunks=system_message,
-                context_records=context_records,
-                llm_calls=0,
-                prompt_tokens=len(system_message.split()),
-                output_tokens=0
-            )
+            entry = (system_message, len(system_message.split()), records)
+            self._cache[query_terms] = entry
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+            return self._make_result(*entry)
         except Exception as e:
             log.error(f"Error building context: {e}", exc_info=True)
             return ContextBuilderResult(
                 context_chunks="",
-                context_records={"documents": pd.DataFrame()},
+                context_records={"documents": []},
                 llm_calls=0,
                 prompt_tokens=0,
                 output_tokens=0